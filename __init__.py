@@ -1,3 +1,57 @@
 # -*- coding: utf-8 -*-
 
-from . general_utilities import *
+"""
+Lazily exposes the public names of the utilities package.
+
+Submodules are only imported when one of their names is first accessed, so
+that e.g. `from utilities import Logger` does not pull in sqlalchemy and
+`import utilities.graph` does not pull in igraph, pandas or py2neo.
+"""
+
+import importlib
+
+
+def _lazy(module_globals, names, submodules=()):
+    """
+    Build module-level __getattr__ and __dir__ functions for a package.
+
+    --- Required parameters ---
+    module_globals: dict -- globals() of the package
+    names:          dict -- public name to the relative module defining it;
+                    a name is imported on first access and then cached in
+                    module_globals
+
+    --- Optional parameter ---
+    submodules:     iterable -- relative submodule names to import on first
+                    attribute access
+
+    returns: (__getattr__, __dir__)
+    """
+    package = module_globals['__name__']
+    submodules = tuple(submodules)
+
+    def __getattr__(name):
+        if name in names:
+            module = importlib.import_module(names[name], package)
+            value = getattr(module, name)
+            module_globals[name] = value
+            return value
+        if name in submodules:
+            return importlib.import_module('.' + name, package)
+        raise AttributeError('module {!r} has no attribute {!r}'.
+                             format(package, name))
+
+    def __dir__():
+        return sorted(set(module_globals) | set(names) | set(submodules))
+
+    return __getattr__, __dir__
+
+
+_lazy_names = {
+    'connect': '.general_utilities',
+    'Logger': '.general_utilities',
+}
+
+__all__ = sorted(_lazy_names)
+
+__getattr__, __dir__ = _lazy(globals(), _lazy_names, ('graph', 'webcrawl'))
@@ -0,0 +1,451 @@
+# -*- coding: utf-8 -*-
+
+"""
+Times graph build, persist and render-prep stages on synthetic graphs.
+
+Vertex and edge tables are generated as Erdos-Renyi or power-law graphs with
+a configurable number of attribute columns of mixed types. For every
+generator and size the following stages are measured:
+
+    build               GraphBuilder(...), i.e. GraphBuilder._make_g
+    write_graph         GraphBuilder.write_graph to a temporary directory
+    neo4j_build         Neo4j_iGraph(...) on an in-process fake Neo4j result
+    vis_prep            GraphVis._vis_igraph
+    vis_render_json     GraphVis._vis_graph with the default JSON payload
+    vis_render_compact  GraphVis._vis_graph with compact=True
+
+Each stage is set up and measured in a fresh process. It is run --repeat
+times plain for 'seconds' (the fastest run; 'seconds_median' is recorded
+too), once while a background thread samples the process RSS for
+'peak_rss_delta_kb' (the stage's peak above the RSS after setup, including
+igraph's C allocations), and once under tracemalloc for 'peak_heap_bytes'
+(Python allocations only).
+
+Results are written as one JSON record per stage. With --baseline, results
+are matched to baseline records with the same stage, generator, size and
+table/vis configuration. A metric regresses when it exceeds the baseline by
+more than --tolerance (seconds) or --memory-tolerance (memory) and by more
+than its absolute noise floor in NOISE_FLOORS; regressions are reported and
+the script exits with status 1. Results without a matching baseline record
+are reported, and if none match the script exits with status 2.
+
+Usage: python benchmarks/bench_graph.py [--sizes 10000 100000 ...]
+           [--generators er powerlaw] [--attr-width N] [--attr-types ...]
+           [--repeat 5] [--out FILE] [--baseline FILE] [--tolerance 0.2]
+           [--memory-tolerance 0.2]
+"""
+
+import argparse
+import contextlib
+import gc
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STAGES = ['build', 'write_graph', 'neo4j_build', 'vis_prep',
+          'vis_render_json', 'vis_render_compact']
+
+# metrics gated by compare() and the tolerance argument each one uses
+TIME_METRICS = ['seconds']
+MEMORY_METRICS = ['peak_rss_delta_kb', 'peak_heap_bytes']
+
+# smallest absolute increase over the baseline that counts as a regression
+NOISE_FLOORS = {'seconds': 0.05, 'peak_rss_delta_kb': 4096,
+                'peak_heap_bytes': 1 << 20}
+
+# run settings that must match for a baseline record to be comparable
+CONFIG_FIELDS = ['attr_types', 'attr_width', 'avg_degree', 'exponent', 'seed',
+                 'vis_limit']
+
+
+def _load_utilities():
+    # register the repository root as the 'utilities' package, whatever the
+    # directory is called on disk
+    if 'utilities' not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            'utilities', os.path.join(REPO_ROOT, '__init__.py'),
+            submodule_search_locations=[REPO_ROOT])
+        sys.modules['utilities'] = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(sys.modules['utilities'])
+    return importlib.import_module('utilities.graph')
+
+
+# --- synthetic tables ---
+
+def _attr_columns(n, width, types, rng, prefix):
+    cols = {}
+    for i in range(width):
+        t = types[i % len(types)]
+        name = '{}_{}_{}'.format(prefix, t, i)
+        if t == 'int':
+            cols[name] = rng.integers(0, 1000, n)
+        elif t == 'float':
+            cols[name] = rng.random(n)
+        elif t == 'bool':
+            cols[name] = rng.random(n) < 0.5
+        elif t == 'str':
+            cols[name] = np.char.add('val', rng.integers(0, 1000, n).
+                                     astype(str)).astype(object)
+        else:
+            raise ValueError('Unknown attribute type "{}"'.format(t))
+    return cols
+
+
+def _endpoints(generator, n_vertices, n_edges, rng, exponent):
+    if generator == 'er':
+        src = rng.integers(0, n_vertices, n_edges)
+        tgt = rng.integers(0, n_vertices, n_edges)
+    elif generator == 'powerlaw':
+        # endpoints drawn with probability proportional to rank^-exponent,
+        # then shuffled so that hubs are not the lowest ids
+        p = np.arange(1, n_vertices + 1, dtype=float) ** -exponent
+        p /= p.sum()
+        perm = rng.permutation(n_vertices)
+        src = perm[rng.choice(n_vertices, n_edges, p=p)]
+        tgt = perm[rng.choice(n_vertices, n_edges, p=p)]
+    else:
+        raise ValueError('Unknown generator "{}"'.format(generator))
+    return src, tgt
+
+
+def make_tables(generator, n_edges, avg_degree=10, attr_width=4,
+                attr_types=('int', 'float', 'str', 'bool'), exponent=1.0,
+                seed=0):
+    """
+    Generate synthetic vertex and edge tables.
+
+    returns: (vertices, edge_list) -- pandas dataframes; vertices are
+             identified by 'v_id' and edges by 'source' and 'target', plus
+             attr_width attribute columns each cycling through attr_types
+    """
+    rng = np.random.default_rng(seed)
+    n_vertices = max(2, int(2 * n_edges / avg_degree))
+    src, tgt = _endpoints(generator, n_vertices, n_edges, rng, exponent)
+    vertices = pd.DataFrame(dict(
+        {'v_id': np.arange(n_vertices),
+         'type': np.where(rng.random(n_vertices) < 0.5, 'A', 'B').
+         astype(object)},
+        **_attr_columns(n_vertices, attr_width, attr_types, rng, 'v')))
+    edge_list = pd.DataFrame(dict(
+        {'source': src, 'target': tgt,
+         'type': np.where(rng.random(n_edges) < 0.5, 'X', 'Y').
+         astype(object)},
+        **_attr_columns(n_edges, attr_width, attr_types, rng, 'e')))
+    return vertices, edge_list
+
+
+# --- in-process stand-in for a py2neo query result ---
+
+class FakeNode(object):
+    def __init__(self, identity, label, properties):
+        self.identity = identity
+        self.labels = {label}
+        self._properties = properties
+
+    def get(self, key, default=None):
+        return self._properties.get(key, default)
+
+    def keys(self):
+        return self._properties.keys()
+
+
+class FakeRelationship(object):
+    def __init__(self, rel_type, start_node, end_node, properties):
+        self._type = rel_type
+        self.start_node = start_node
+        self.end_node = end_node
+        self._properties = properties
+
+    def get(self, key, default=None):
+        return self._properties.get(key, default)
+
+    def keys(self):
+        return self._properties.keys()
+
+    def types(self):
+        return {self._type}
+
+
+class FakeCursor(object):
+    def __init__(self, record):
+        self._record = record
+
+    def next(self):
+        return self._record
+
+
+class FakeNeo4jGraph(object):
+    """Answers any query with the same sources/targets/edges record."""
+
+    def __init__(self, vertices, edge_list):
+        v_props = vertices.drop(columns=['type']).to_dict('records')
+        nodes = [FakeNode(i, label, p) for i, (label, p) in
+                 enumerate(zip(vertices['type'], v_props))]
+        e_props = edge_list.drop(columns=['source', 'target', 'type']).\
+            to_dict('records')
+        edges = [FakeRelationship(t, nodes[s], nodes[d], p) for s, d, t, p in
+                 zip(edge_list['source'], edge_list['target'],
+                     edge_list['type'], e_props)]
+        self._record = {'sources': [e.start_node for e in edges],
+                        'targets': [e.end_node for e in edges],
+                        'edges': edges}
+
+    def run(self, query):
+        return FakeCursor(self._record)
+
+
+# --- measurement ---
+
+def _current_rss_kb():
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() // 1024
+    except OSError:
+        # no procfs; fall back to the process high-water mark
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class _RSSSampler(object):
+    """Tracks the peak RSS reached while the context is active."""
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.peak_delta_kb = 0
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            self._peak = max(self._peak, _current_rss_kb())
+
+    def __enter__(self):
+        self._start = self._peak = _current_rss_kb()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+        self._peak = max(self._peak, _current_rss_kb())
+        self.peak_delta_kb = self._peak - self._start
+
+
+def _measure(func, repeat=1):
+    """
+    Run func once for RSS, once for Python heap and repeat times for time,
+    so that neither the sampler thread nor tracemalloc skews the timing.
+
+    returns: (value of the last timed run, metrics dict)
+    """
+    gc.collect()
+    with _RSSSampler() as sampler:
+        func()
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak_heap = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        value = func()
+        timings.append(time.perf_counter() - start)
+    return value, {'seconds': min(timings),
+                   'seconds_median': float(np.median(timings)),
+                   'peak_rss_delta_kb': sampler.peak_delta_kb,
+                   'peak_heap_bytes': peak_heap}
+
+
+def _run_stage(stage, generator, n_edges, vis_limit=None, repeat=1,
+               **table_kw):
+    """
+    Set up and measure a single stage. Runs in its own process, so memory
+    freed by other stages cannot hide this stage's peak.
+    """
+    graph = _load_utilities()
+    vertices, edge_list = make_tables(generator, n_edges, **table_kw)
+    record = {'generator': generator, 'edges': n_edges,
+              'vertices': len(vertices), 'stage': stage}
+
+    if stage == 'build':
+        _, m = _measure(lambda: graph.GraphBuilder(
+            vertices, edge_list, 'source', 'target', 'v_id', directed=True),
+            repeat)
+        return dict(record, **m)
+
+    if stage == 'neo4j_build':
+        neo4j_graph = FakeNeo4jGraph(vertices, edge_list)
+        _, m = _measure(lambda: graph.Neo4j_iGraph(
+            'MATCH (n) RETURN n', neo4j_graph, 'v_id', 'v_id'), repeat)
+        return dict(record, **m)
+
+    builder = graph.GraphBuilder(vertices, edge_list, 'source', 'target',
+                                 'v_id', directed=True)
+    if stage == 'write_graph':
+        tmp = tempfile.mkdtemp()
+        try:
+            _, m = _measure(lambda: builder.write_graph(
+                os.path.join(tmp, 'g')), repeat)
+        finally:
+            shutil.rmtree(tmp)
+        return dict(record, **m)
+
+    # GraphVis displays its notebook setup script on construction
+    with contextlib.redirect_stdout(io.StringIO()):
+        vis = graph.GraphVis(compact=(stage == 'vis_render_compact'))
+    # GraphBuilder stores the v_ident column as the 'identifier' attribute
+    options = {'node_type': 'type',
+               'vis_labels': {'A': 'identifier', 'B': 'identifier'},
+               'edge_type': 'type'}
+    if stage == 'vis_prep':
+        _, m = _measure(lambda: vis._vis_igraph(builder.g, options,
+                                                vis_limit), repeat)
+        return dict(record, **m)
+
+    nodes, edges, attrs = vis._vis_igraph(builder.g, options, vis_limit)
+    html, m = _measure(lambda: vis._vis_graph(nodes, edges, True, 500, True,
+                                              attrs), repeat)
+    return dict(record, payload_bytes=len(html.data), **m)
+
+
+def run_case(generator, n_edges, vis_limit=None, repeat=1, **table_kw):
+    """Return one result dict per stage for a single generator and size."""
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    for stage in STAGES:
+        with ctx.Pool(1) as pool:
+            results.append(pool.apply(_run_stage, (stage, generator, n_edges,
+                                                   vis_limit, repeat),
+                                      table_kw))
+    return results
+
+
+def _key(record):
+    config = tuple(json.dumps(record.get(f), sort_keys=True)
+                   for f in CONFIG_FIELDS)
+    return (record['generator'], record['edges'], record['stage']) + config
+
+
+def compare(results, baseline, tolerance, memory_tolerance):
+    """
+    Compare results with baseline records of the same stage, generator,
+    size and configuration.
+
+    returns: (regressions, unmatched) -- one record per metric worse than
+             its baseline by more than its tolerance and its noise floor,
+             and the results that have no comparable baseline record
+    """
+    limits = dict([(m, tolerance) for m in TIME_METRICS] +
+                  [(m, memory_tolerance) for m in MEMORY_METRICS])
+    base = {_key(r): r for r in baseline}
+    regressions, unmatched = [], []
+    for r in results:
+        b = base.get(_key(r))
+        if not b:
+            unmatched.append(r)
+            continue
+        for metric, limit in sorted(limits.items()):
+            if metric not in b:
+                continue
+            if (r[metric] > b[metric] * (1 + limit) and
+                    r[metric] - b[metric] > NOISE_FLOORS[metric]):
+                regressions.append(dict(r, metric=metric, value=r[metric],
+                                        baseline_value=b[metric]))
+    return regressions, unmatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10 ** 4, 10 ** 5],
+                        help='edge counts, e.g. 10000 ... 10000000')
+    parser.add_argument('--generators', nargs='+', default=['er', 'powerlaw'],
+                        choices=['er', 'powerlaw'])
+    parser.add_argument('--avg-degree', type=float, default=10)
+    parser.add_argument('--exponent', type=float, default=1.0,
+                        help='power-law exponent')
+    parser.add_argument('--attr-width', type=int, default=4)
+    parser.add_argument('--attr-types', nargs='+',
+                        default=['int', 'float', 'str', 'bool'],
+                        choices=['int', 'float', 'str', 'bool'])
+    parser.add_argument('--vis-limit', type=int, default=None,
+                        help='vertices sampled for the vis stages; ' +
+                             'defaults to all')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='timed runs per stage; the fastest is gated')
+    parser.add_argument('--out', default=None,
+                        help='file to write JSON lines to; defaults to stdout')
+    parser.add_argument('--baseline', default=None,
+                        help='JSON lines file from a previous run')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed slowdown relative to the baseline')
+    parser.add_argument('--memory-tolerance', type=float, default=0.2,
+                        help='allowed memory growth relative to the ' +
+                             'baseline')
+    args = parser.parse_args()
+
+    meta = {'python': platform.python_version(),
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'attr_width': args.attr_width, 'attr_types': args.attr_types,
+            'avg_degree': args.avg_degree, 'exponent': args.exponent,
+            'seed': args.seed, 'vis_limit': args.vis_limit,
+            'repeat': args.repeat}
+    results = []
+    for generator in args.generators:
+        for size in args.sizes:
+            results += [dict(meta, **r) for r in
+                        run_case(generator, size,
+                                 vis_limit=args.vis_limit,
+                                 repeat=args.repeat,
+                                 avg_degree=args.avg_degree,
+                                 attr_width=args.attr_width,
+                                 attr_types=args.attr_types,
+                                 exponent=args.exponent, seed=args.seed)]
+
+    lines = [json.dumps(r, sort_keys=True) for r in results]
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+    else:
+        print('\n'.join(lines))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = [json.loads(line) for line in f if line.strip()]
+        regressions, unmatched = compare(results, baseline, args.tolerance,
+                                         args.memory_tolerance)
+        for r in unmatched:
+            print('NO BASELINE {generator} edges={edges} {stage}: no record '
+                  'with the same configuration'.format(**r), file=sys.stderr)
+        if unmatched and len(unmatched) == len(results):
+            print('Baseline was produced with a different configuration; ' +
+                  'nothing compared', file=sys.stderr)
+            sys.exit(2)
+        for r in regressions:
+            print('REGRESSION {generator} edges={edges} {stage} {metric}: '
+                  '{value:.6g} vs {baseline_value:.6g}'.format(**r),
+                  file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
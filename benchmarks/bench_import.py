@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+"""
+Measures cold-start import time and memory for each utilities entry point.
+
+Every entry point is imported in a fresh interpreter so that no module is
+already cached. Results are written as one JSON record per entry point.
+
+Usage: python benchmarks/bench_import.py [--repeat N] [--out FILE]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = [
+    ('utilities', 'import utilities'),
+    ('utilities.Logger', 'from utilities import Logger'),
+    ('utilities.connect', 'from utilities import connect'),
+    ('utilities.graph', 'import utilities.graph'),
+    ('utilities.graph.GraphBuilder',
+     'from utilities.graph import GraphBuilder'),
+    ('utilities.graph.GraphVis', 'from utilities.graph import GraphVis'),
+    ('utilities.webcrawl', 'import utilities.webcrawl'),
+    ('utilities.webcrawl.Crawler', 'from utilities.webcrawl import Crawler'),
+]
+
+HEAVY_MODULES = ['IPython', 'igraph', 'pandas', 'py2neo', 'random_user_agent',
+                 'requests_html', 'selenium', 'sqlalchemy']
+
+# Run in the child interpreter. The package is registered under the name
+# 'utilities' straight from the repository root, whatever that directory is
+# called on disk.
+_CHILD = """
+import importlib.util, json, resource, sys, time
+root, stmt, heavy = sys.argv[1], sys.argv[2], sys.argv[3].split(',')
+spec = importlib.util.spec_from_file_location(
+    'utilities', root + '/__init__.py', submodule_search_locations=[root])
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+error = None
+try:
+    sys.modules['utilities'] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sys.modules['utilities'])
+    exec(stmt)
+except Exception as e:
+    error = '{}: {}'.format(type(e).__name__, e)
+elapsed = time.perf_counter() - start
+rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'seconds': elapsed,
+                  'peak_rss_kb': rss_after,
+                  'rss_delta_kb': rss_after - rss_before,
+                  'heavy_modules': [m for m in heavy if m in sys.modules],
+                  'error': error}))
+"""
+
+
+def _run_once(stmt):
+    out = subprocess.run([sys.executable, '-c', _CHILD, REPO_ROOT, stmt,
+                          ','.join(HEAVY_MODULES)],
+                         stdout=subprocess.PIPE, check=True,
+                         universal_newlines=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def run(repeat=5):
+    """Return one result dict per entry point, keeping the fastest run."""
+    results = []
+    for name, stmt in ENTRY_POINTS:
+        runs = [_run_once(stmt) for _ in range(repeat)]
+        best = min(runs, key=lambda r: r['seconds'])
+        best.update({'entry_point': name, 'statement': stmt,
+                     'repeat': repeat})
+        results.append(best)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out', default=None,
+                        help='file to write JSON lines to; defaults to stdout')
+    args = parser.parse_args()
+    lines = [json.dumps(r, sort_keys=True) for r in run(args.repeat)]
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+    else:
+        print('\n'.join(lines))
+
+
+if __name__ == '__main__':
+    main()
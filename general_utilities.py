@@ -5,7 +5,6 @@
 from configparser import ConfigParser
 import logging
 import os
-import sqlalchemy
 from utilities.decorators import error_trap
 
 
@@ -38,7 +37,9 @@ def _connect(section, filename):
         db_url += ':{}'.format(params['port'])
     db_url += '/{}'.format(params['dbname'])
 
-    # connect to the SQL server
+    # connect to the SQL server; sqlalchemy is imported here rather than at
+    # module level so that importing Logger stays cheap
+    import sqlalchemy
     print('Connecting to the database...')
     con = sqlalchemy.create_engine(db_url).connect()
     if params.get('search_path'):
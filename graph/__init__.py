@@ -1,3 +1,18 @@
 # -*- coding: utf-8 -*-
 
-from . graph_utilities import *
+"""
+Lazily exposes the graph classes; igraph, pandas, py2neo and IPython are only
+imported once one of them is first accessed.
+"""
+
+from .. import _lazy
+
+_lazy_names = {
+    'GraphBuilder': '.graph_utilities',
+    'GraphVis': '.graph_utilities',
+    'Neo4j_iGraph': '.graph_utilities',
+}
+
+__all__ = sorted(_lazy_names)
+
+__getattr__, __dir__ = _lazy(globals(), _lazy_names)
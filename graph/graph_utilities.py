@@ -4,14 +4,14 @@
 Classes for building igraph graphs and visualizing igraphs and Neo4j graphs.
 """
 
+import base64
 import igraph
 import json
+import numpy as np
 from numpy.random import choice as random_choice
 import pandas as pd
 import pickle
-import py2neo
 import uuid
-from IPython.display import display, HTML, Javascript
 
 
 class GraphBuilder(object):
@@ -158,7 +158,12 @@ class GraphVis(object):
     Modified from https://github/merqurio/neo4jupyter/blob/master/neo4jupyter.py
     """
 
-    def __init__(self, directed=True, height=500, limit=100, physics=True):
+    # (vis_js, vis_css) pairs already injected into the notebook by this
+    # kernel
+    _offline_loaded = set()
+
+    def __init__(self, directed=True, height=500, limit=100, physics=True,
+                 offline=False, compact=False, vis_js=None, vis_css=None):
         """
         Optional parameters for graph drawing.
 
@@ -176,18 +181,61 @@ class GraphVis(object):
         physics:  boolean -- Flags whether the drawing routine should use
                   physics. Defaults to True.
 
+        offline:  boolean -- Flags whether vis.js should be read from the
+                  local files vis_js and vis_css and inlined into the
+                  notebook, once per kernel, instead of being loaded from a
+                  CDN. Defaults to False.
+
+        compact:  boolean -- Flags whether node and edge arrays should be sent
+                  as base64-encoded columnar buffers decoded in the browser.
+                  Instead of a repr string per node, the attributes shown in
+                  node tooltips are sent as columnar buffers too, and the
+                  tooltip text is built in the browser. Defaults to False.
+
+        vis_js:   str -- Path to a local vis.min.js (vis 4.8.2). Required
+                  when offline is True.
+
+        vis_css:  str -- Path to a local vis.min.css (vis 4.8.2). Required
+                  when offline is True.
+
         """
+        if offline and not (vis_js and vis_css):
+            raise ValueError('offline=True requires vis_js and vis_css, the ' +
+                             'paths to local copies of vis.min.js and ' +
+                             'vis.min.css (vis 4.8.2)')
         self.directed = directed
         self.height = height
         self.limit = limit
         self.physics = physics
+        self.offline = offline
+        self.compact = compact
+        self.vis_js = vis_js
+        self.vis_css = vis_css
         self._html_template = """
             <div id='{id}' style='height: {height}px;'></div>
 
             <script type='text/javascript'>
+            (function() {{
+                var container = document.getElementById('{id}');
+                var missing = 'vis.js is not loaded in this page; re-run ' +
+                              'the cell that creates GraphVis.';
+                if (window.vis) {{
+                    draw();
+                }} else if (window.require) {{
+                    require(['vis'], function(vis) {{
+                        window.vis = vis;
+                        draw();
+                    }}, function() {{
+                        container.textContent = missing;
+                    }});
+                }} else {{
+                    container.textContent = missing;
+                }}
+
+                function draw() {{
+                {prelude}
                 var nodes = {nodes};
                 var edges = {edges};
-                var container = document.getElementById('{id}');
                 var data = {{
                     nodes: nodes,
                     edges: edges
@@ -221,14 +269,122 @@ class GraphVis(object):
                     }}
                 }};
                 var network = new vis.Network(container, data, options);
+                }}
+            }})();
             </script>
             """
+        # decodes the columnar payload built by _encode_columns into a list
+        # of vis.js node or edge objects
+        self._decode_js = """
+                function decodeArray(col, n) {
+                    var out = new Array(n);
+                    if (col.t === 'rle') {
+                        var deltas = decodeArray(col.d, col.r);
+                        var counts = decodeArray(col.c, col.r);
+                        var k = 0, value = 0;
+                        for (var r = 0; r < col.r; r++) {
+                            value += deltas[r];
+                            for (var j = 0; j < counts[r]; j++) {
+                                out[k++] = value;
+                            }
+                        }
+                    } else {
+                        var raw = atob(col.b);
+                        var buf = new ArrayBuffer(raw.length);
+                        var bytes = new Uint8Array(buf);
+                        for (var i = 0; i < raw.length; i++) {
+                            bytes[i] = raw.charCodeAt(i);
+                        }
+                        if (col.t === 'b1') {
+                            for (var i = 0; i < n; i++) {
+                                out[i] = (bytes[i >> 3] >> (i & 7)) & 1;
+                            }
+                        } else {
+                            var arr = new ({u1: Uint8Array, u2: Uint16Array,
+                                            i4: Int32Array,
+                                            f8: Float64Array}[col.t])(buf);
+                            for (var i = 0; i < n; i++) {
+                                out[i] = arr[i];
+                            }
+                        }
+                    }
+                    if (col.v) {
+                        for (var i = 0; i < n; i++) {
+                            out[i] = col.v[out[i]];
+                        }
+                    }
+                    return out;
+                }
+
+                function decodeColumns(payload) {
+                    var out = [];
+                    for (var i = 0; i < payload.n; i++) {
+                        out.push({});
+                    }
+                    Object.keys(payload.columns).forEach(function(key) {
+                        var values = decodeArray(payload.columns[key],
+                                                 payload.n);
+                        for (var i = 0; i < payload.n; i++) {
+                            out[i][key] = values[i];
+                        }
+                    });
+                    return out;
+                }
+
+                // sets each node's tooltip from the matching decoded
+                // attribute record; refs maps attributes that duplicate a
+                // node field to that field
+                function addTitles(nodes, attrs, refs) {
+                    var escape = function(text) {
+                        return String(text).replace(/&/g, '&amp;').
+                            replace(/</g, '&lt;').replace(/>/g, '&gt;');
+                    };
+                    nodes.forEach(function(node, i) {
+                        Object.keys(refs).forEach(function(key) {
+                            attrs[i][key] = node[refs[key]];
+                        });
+                        node.title = Object.keys(attrs[i]).sort().
+                            map(function(key) {
+                                return escape(key) + ': ' +
+                                       escape(JSON.stringify(attrs[i][key]));
+                            }).join('<br>');
+                    });
+                    return nodes;
+                }
+            """
         self._init_notebook_mode()
 
     def _init_notebook_mode(self):
         """
         Creates a script tag and prints the JS read from the file in the tag.
+
+        In offline mode the local vis.js and its stylesheet are inlined
+        instead, and only the first time in the current kernel, so that the
+        bundle is stored in the notebook once rather than per instance.
         """
+        from IPython.display import display, Javascript
+        if self.offline:
+            key = (self.vis_js, self.vis_css)
+            if key in GraphVis._offline_loaded:
+                return
+            with open(self.vis_js) as f:
+                vis_js = f.read()
+            with open(self.vis_css) as f:
+                vis_css = f.read()
+            # hide require.js' define so that the UMD bundle sets window.vis
+            display(Javascript(data=(
+                "if (!window.vis) { " +
+                "(function(define) {\n" + vis_js + "\n})" +
+                ".call(window, undefined); " +
+                "} " +
+                "if (!document.getElementById('vis-css')) { " +
+                "    var style = document.createElement('style'); " +
+                "    style.id = 'vis-css'; " +
+                "    style.textContent = " + json.dumps(vis_css) + "; " +
+                "    document.head.appendChild(style); " +
+                "}")))
+            GraphVis._offline_loaded.add(key)
+            return
         display(
             Javascript(data="require.config({ " +
                             "    paths: { " +
@@ -243,7 +399,97 @@ class GraphVis(object):
                             'vis.css')
         )
 
-    def _vis_graph(self, nodes, edges, directed, height, physics):
+    @staticmethod
+    def _json_default(obj):
+        # numpy scalars come straight out of igraph attributes built from
+        # pandas columns
+        return obj.item() if isinstance(obj, np.generic) else str(obj)
+
+    @staticmethod
+    def _int_dtype(arr):
+        if len(arr) and arr.min() >= 0 and arr.max() < 2:
+            return 'b1'
+        if not len(arr) or (arr.min() >= 0 and arr.max() < 2 ** 8):
+            return 'u1'
+        if arr.min() >= 0 and arr.max() < 2 ** 16:
+            return 'u2'
+        if arr.min() >= -2 ** 31 and arr.max() < 2 ** 31:
+            return 'i4'
+        return 'f8'
+
+    @classmethod
+    def _pack(cls, arr, runs=True):
+        """
+        Packs an int64 array into the narrowest buffer that holds it, or
+        into runs of delta-encoded values when it is non-decreasing and
+        that is smaller.
+        """
+        t = cls._int_dtype(arr)
+        if t == 'b1':
+            data = np.packbits(arr.astype(np.uint8), bitorder='little')
+        else:
+            data = arr.astype('<' + t)
+        col = {'t': t, 'b': base64.b64encode(data.tobytes()).decode('ascii')}
+        if runs and len(arr) > 1 and np.all(arr[1:] >= arr[:-1]):
+            starts = np.flatnonzero(np.r_[True, arr[1:] != arr[:-1]])
+            values = arr[starts]
+            rle = {'t': 'rle', 'r': len(starts),
+                   'd': cls._pack(np.diff(values, prepend=0), False),
+                   'c': cls._pack(np.diff(np.r_[starts, len(arr)]), False)}
+            if len(json.dumps(rle)) < len(json.dumps(col)):
+                return rle
+        return col
+
+    @classmethod
+    def _encode_columns(cls, records):
+        """Encodes a list of dicts as base64 columnar buffers."""
+        keys = sorted(set(k for r in records for k in r))
+        return cls._encode_column_dict(
+            {key: [r.get(key) for r in records] for key in keys},
+            len(records))
+
+    @classmethod
+    def _encode_column_dict(cls, column_values, n):
+        """
+        Encodes a dict of equal-length value lists as base64 columnar
+        buffers.
+
+        Integer columns are packed by _pack, other numeric columns as
+        float64; all remaining columns are dictionary-encoded as packed
+        integer codes into a list of their distinct values.
+        """
+        def is_int(v):
+            return (isinstance(v, (int, np.integer)) and
+                    not isinstance(v, (bool, np.bool_)))
+
+        def is_num(v):
+            return is_int(v) or isinstance(v, (float, np.floating))
+
+        columns = {}
+        for key, values in sorted(column_values.items()):
+            if all(is_int(v) for v in values):
+                col = cls._pack(np.asarray(values, dtype=np.int64))
+            elif all(is_num(v) for v in values):
+                data = np.asarray(values, dtype='<f8').tobytes()
+                col = {'t': 'f8',
+                       'b': base64.b64encode(data).decode('ascii')}
+            else:
+                codes, uniques = {}, []
+                arr = []
+                for v in values:
+                    k = json.dumps(v, sort_keys=True,
+                                   default=cls._json_default)
+                    if k not in codes:
+                        codes[k] = len(uniques)
+                        uniques.append(json.loads(k))
+                    arr.append(codes[k])
+                col = cls._pack(np.asarray(arr, dtype=np.int64))
+                col['v'] = uniques
+            columns[key] = col
+        return {'n': n, 'columns': columns}
+
+    def _vis_graph(self, nodes, edges, directed, height, physics,
+                   attrs=None):
         """
         Creates the HTML page.
 
@@ -251,13 +497,49 @@ class GraphVis(object):
         nodes:   list -- The nodes represented as dicts containing their data.
         edges:   list -- The edges represented as dicts containing their data.
 
+        --- Optional parameter ---
+        attrs:   dict -- In compact mode, maps attribute names to lists of
+                 values aligned with nodes; shown in the node tooltips.
+
         returns: IPython.display.HTML
         """
+        from IPython.display import HTML
+
+        if self.compact:
+            prelude = self._decode_js
+            refs = {}
+            if attrs:
+                # tooltip attributes identical to a node field, typically
+                # the label and group, are taken from that field
+                fields = {k: [n.get(k) for n in nodes] for k in
+                          sorted(set(k for n in nodes for k in n)) if
+                          k != 'id'}
+                refs = {a: next((k for k, v in fields.items() if v == vals),
+                                None) for a, vals in attrs.items()}
+                refs = {a: k for a, k in refs.items() if k}
+                attrs = {a: v for a, v in attrs.items() if a not in refs}
+            n_nodes = len(nodes)
+            nodes = 'decodeColumns({})'.format(
+                json.dumps(self._encode_columns(nodes)))
+            if attrs is not None:
+                nodes = 'addTitles({}, decodeColumns({}), {})'.format(
+                    nodes, json.dumps(self._encode_column_dict(attrs,
+                                                               n_nodes)),
+                    json.dumps(refs))
+            # sorted sources are sent as runs
+            edges = sorted(edges, key=lambda e: e['from'])
+            edges = ('decodeColumns({})'.
+                     format(json.dumps(self._encode_columns(edges))))
+        else:
+            prelude = ''
+            nodes = json.dumps(nodes, default=self._json_default)
+            edges = json.dumps(edges, default=self._json_default)
 
         html = self._html_template.format(id=uuid.uuid4(),
                                           height=json.dumps(height),
-                                          nodes=json.dumps(nodes),
-                                          edges=json.dumps(edges),
+                                          prelude=prelude,
+                                          nodes=nodes,
+                                          edges=edges,
                                           directed=json.dumps(directed),
                                           physics=json.dumps(physics))
         return HTML(html)
@@ -272,8 +554,10 @@ class GraphVis(object):
         node_label = next(iter(node.labels), '')
         prop_key = options.get(node_label)
         vis_label = node.get(prop_key, '')
-        return {'id': id(node), 'label': vis_label, 'group': node_label,
-                'title': repr(node)}
+        info = {'id': id(node), 'label': vis_label, 'group': node_label}
+        if not self.compact:
+            info['title'] = repr(node)
+        return info
 
     def _vis_neo_graph(self, graph, options, limit):
         query = ('MATCH (n) WITH n, rand() AS random ORDER BY random' +
@@ -288,12 +572,19 @@ class GraphVis(object):
         nodes = [self._get_neo_node_info(n, options) for n in _nodes]
         edges = [self._get_neo_edge_info(r) for r in _edges]
 
-        return nodes, edges
+        return nodes, edges, self._neo_title_attrs(_nodes)
 
     def _vis_neo_subgraph(self, subgraph, options):
         nodes = [self._get_neo_node_info(n, options) for n in subgraph.nodes]
         edges = [self._get_neo_edge_info(r) for r in subgraph.relationships]
-        return nodes, edges
+        return nodes, edges, self._neo_title_attrs(list(subgraph.nodes))
+
+    # columns of node properties shown in compact-mode tooltips
+    def _neo_title_attrs(self, nodes):
+        if not self.compact:
+            return None
+        keys = sorted(set(k for n in nodes for k in n.keys()))
+        return {k: [n.get(k) for n in nodes] for k in keys}
 
     def _vis_igraph(self, g, options, limit):
         nodes = []
@@ -307,11 +598,16 @@ class GraphVis(object):
         for v in _g.vs:
             node_label = v.attributes().get(node_type, '')
             vis_label = v.attributes().get(vis_labels.get(node_label, ''), '')
-            nodes.append({'id': v.index, 'label': vis_label,
-                          'group': node_label, 'title': repr(v)})
+            node = {'id': v.index, 'label': vis_label, 'group': node_label}
+            if not self.compact:
+                node['title'] = repr(v)
+            nodes.append(node)
         edges = [{'from': e.source, 'to': e.target,
                   'label': e.attributes().get(edge_type, '')} for e in _g.es]
-        return nodes, edges
+        # columns of vertex attributes shown in compact-mode tooltips
+        attrs = ({a: _g.vs[a] for a in _g.vs.attributes()} if self.compact
+                 else None)
+        return nodes, edges, attrs
 
     def vis(self, g, options={}, directed=None, height=None, limit=None,
             physics=None):
@@ -355,17 +651,20 @@ class GraphVis(object):
 
         returns: IPython.display.HTML
         """
+        import py2neo
+
         directed = directed if directed is not None else self.directed
         height = height if height else self.height
         limit = limit if limit else self.limit
         physics = physics if physics is not None else self.physics
         if type(g) == py2neo.database.Graph:
-            nodes, edges = self._vis_neo_graph(g, options, limit)
+            nodes, edges, attrs = self._vis_neo_graph(g, options, limit)
         elif type(g) == py2neo.data.Subgraph:
-            nodes, edges = self._vis_neo_subgraph(g, options)
+            nodes, edges, attrs = self._vis_neo_subgraph(g, options)
         elif type(g) == igraph.Graph:
-            nodes, edges = self._vis_igraph(g, options, limit)
+            nodes, edges, attrs = self._vis_igraph(g, options, limit)
         else:
             raise TypeError('Graph must be a py2neo graph or subgraph, or an' +
                             ' igraph graph')
-        return self._vis_graph(nodes, edges, directed, height, physics)
+        return self._vis_graph(nodes, edges, directed, height, physics,
+                               attrs)
@@ -1,3 +1,20 @@
 # -*- coding: utf-8 -*-
 
-from . crawl_utilities import *
+"""
+Lazily exposes the crawling utilities; selenium, requests_html,
+random_user_agent and pandas are only imported once one of them is first
+accessed.
+"""
+
+from .. import _lazy
+
+_lazy_names = {
+    'Crawler': '.crawl_utilities',
+    'HeaderGenerator': '.crawl_utilities',
+    'WebDriver': '.crawl_utilities',
+    'parse_text': '.crawl_utilities',
+}
+
+__all__ = sorted(_lazy_names)
+
+__getattr__, __dir__ = _lazy(globals(), _lazy_names)